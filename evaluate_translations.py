@@ -1,52 +1,206 @@
 import pandas as pd
 from sentence_transformers import SentenceTransformer, util
 from tqdm import tqdm
+import argparse
+import hashlib
+import os
 import warnings
 
 warnings.filterwarnings("ignore")  # Suppress transformer warnings
 
+# --- Configuration ---
+# Defaults; override with --input/--output/--previous (e.g. --input translated_dataset_tagalog.csv
+# to score the cebuano/ilocano columns written by main.py)
+INPUT_PATH = "translated_dataset_tagalog2.csv"
+OUTPUT_PATH = "evaluated_translations_with_similarity2.csv"
+SOURCE_COL = "utterance"
+EMBEDDING_MODEL = "meedan/paraphrase-filipino-mpnet-base-v2"
+MODEL_COL = "similarity_model"  # Records which model produced the scores, so a swap invalidates them
+
+# Translation columns to score (any that are present in the input get scored).
+# 'tagalog' keeps the plain 'similarity'/'needs_review' names that manual_translate.py expects.
+TARGET_COLS = ["tagalog", "cebuano", "ilocano", "human_corrected_tagalog"]
+# Columns where a blank cell means "not reviewed yet": left unscored and unflagged.
+# A blank machine translation is still scored (and so flagged) like any other row.
+SKIP_BLANK_COLS = ["human_corrected_tagalog"]
+
+batch_size = 32
+threshold = 0.70
+
+
+def score_columns(target):
+    """Returns the (similarity, needs_review) column names for a target column."""
+    if target == "tagalog":
+        return "similarity", "needs_review"
+    return f"similarity_{target}", f"needs_review_{target}"
+
+
+def row_hashes(frame, target):
+    """Content hash of each (source, translation) pair, used to spot rows that changed."""
+    sources = frame[SOURCE_COL].fillna("").astype(str)
+    translations = frame[target].fillna("").astype(str)
+    return [
+        hashlib.sha1(f"{src}\x1f{tl}".encode("utf-8")).hexdigest()
+        for src, tl in zip(sources, translations)
+    ]
+
+
+def is_blank(text):
+    """True for NaN or whitespace-only cells, e.g. rows a reviewer hasn't corrected yet."""
+    return pd.isna(text) or str(text).strip() == ""
+
+
+def load_previous(path):
+    """Loads a previous evaluation, or None if it is missing or was scored with another model."""
+    if not os.path.exists(path):
+        print(f"[INFO] No previous evaluation at '{path}', scoring every row.")
+        return None
+    try:
+        prev = pd.read_csv(path)
+    except Exception as e:
+        print(f"[WARNING] Could not read previous evaluation '{path}': {e}. Scoring every row.")
+        return None
+
+    models = set(prev[MODEL_COL].dropna().unique()) if MODEL_COL in prev.columns else set()
+    if models != {EMBEDDING_MODEL}:
+        print(f"[INFO] Previous evaluation was not scored with '{EMBEDDING_MODEL}' "
+              f"(found {sorted(models) or 'no model recorded'}), scoring every row.")
+        return None
+    return prev
+
+
+def previous_scores(prev, targets):
+    """Maps content hash -> similarity for every target already scored in a previous run."""
+    previous = {}
+    for target in targets:
+        sim_col, _ = score_columns(target)
+        if SOURCE_COL not in prev.columns or target not in prev.columns or sim_col not in prev.columns:
+            continue
+        scored = prev[prev[sim_col].notna()]
+        previous[target] = dict(zip(row_hashes(scored, target), scored[sim_col]))
+    return previous
+
+
+def carry_over_missing_targets(prev, df, targets, previous_path):
+    """Copies scored targets that are absent from this run's input, so overwriting the output doesn't drop them."""
+    same_rows = (
+        SOURCE_COL in prev.columns
+        and len(prev) == len(df)
+        and prev[SOURCE_COL].fillna("").astype(str).tolist() == df[SOURCE_COL].fillna("").astype(str).tolist()
+    )
+    for target in TARGET_COLS:
+        if target in targets or target not in prev.columns:
+            continue
+        cols = [target, *score_columns(target)]
+        cols = [col for col in cols if col in prev.columns]
+        if not same_rows:
+            print(f"[WARNING] '{target}' is not in this run's input and the rows no longer line up with "
+                  f"'{previous_path}'; its previous scores will not be kept.")
+            continue
+        for col in cols:
+            df[col] = prev[col].values
+        print(f"[INFO] Kept previous '{target}' scores (not in this run's input).")
+
+
+parser = argparse.ArgumentParser(description="Score translations against the English source.")
+parser.add_argument("--input", default=INPUT_PATH,
+                    help=f"Translated dataset to score (default: {INPUT_PATH})")
+parser.add_argument("--output", default=OUTPUT_PATH,
+                    help=f"Where to save the scored dataset (default: {OUTPUT_PATH})")
+parser.add_argument("--previous", default=None,
+                    help="Earlier evaluation whose unchanged scores are carried forward (default: the --output file)")
+parser.add_argument("--full", action="store_true",
+                    help="Rescore every row instead of reusing unchanged scores from the previous evaluation")
+args = parser.parse_args()
+previous_path = args.previous or args.output
+
 # 1. Load Dataset
-df = pd.read_csv("translated_dataset_tagalog2.csv")
+df = pd.read_csv(args.input)
 print(f"Original dataset shape: {df.shape}")
 
-# 2. Initialize Sentence Embedding Model
-try:
-    print("📦 Loading SentenceTransformer model (this may take a few minutes)...")
-    model = SentenceTransformer("meedan/paraphrase-filipino-mpnet-base-v2")
-    print("✅ Model loaded.")
-except Exception as e:
-    print(f"Failed to load model: {e}")
-    exit()
+# 2. Clean + Prepare Columns
+targets = [col for col in TARGET_COLS if col in df.columns]
+if SOURCE_COL not in df.columns or not targets:
+    raise ValueError(f"Missing '{SOURCE_COL}' or any of {TARGET_COLS} columns in dataset.")
 
-# 3. Clean + Prepare Columns
-if not all(col in df.columns for col in ["utterance", "tagalog"]):
-    raise ValueError("Missing 'utterance' or 'tagalog' columns in dataset.")
+utterances = df[SOURCE_COL].fillna("").astype(str).tolist()
 
-utterances = df["utterance"].fillna("").astype(str).tolist()
-tagalogs = df["tagalog"].fillna("").astype(str).tolist()
+# 3. Carry forward scores for rows whose content hasn't changed
+# (a blank cell in a SKIP_BLANK_COLS column isn't scored: it stays NaN and isn't flagged)
+prev = load_previous(previous_path)
+previous = previous_scores(prev, targets) if prev is not None and not args.full else {}
 
-# 4. Compute Similarities in Batches (with tqdm)
-batch_size = 32
-similarities = []
+similarities = {}
+pending = {}  # target -> {hash: (utterance, translation)} still to be embedded
+for target in targets:
+    hashes = row_hashes(df, target)
+    cached = previous.get(target, {})
+    if target in SKIP_BLANK_COLS:
+        blank = df[target].apply(is_blank).tolist()
+    else:
+        blank = [False] * len(df)
+    similarities[target] = [None if b else cached.get(h) for h, b in zip(hashes, blank)]
 
-print("🔍 Scoring semantic similarity...")
-for i in tqdm(range(0, len(df), batch_size), desc="Scoring"):
-    batch_en = utterances[i:i+batch_size]
-    batch_tl = tagalogs[i:i+batch_size]
+    translations = df[target].fillna("").astype(str).tolist()
+    pending[target] = {
+        h: (utterances[i], translations[i])
+        for i, h in enumerate(hashes)
+        if not blank[i] and h not in cached
+    }
+    reused = sum(not b and h in cached for h, b in zip(hashes, blank))
+    print(f"[{target}] {reused} rows reused, {sum(blank)} blank rows skipped, "
+          f"{len(pending[target])} unique pairs to score")
 
-    embeddings_en = model.encode(batch_en, convert_to_tensor=True)
-    embeddings_tl = model.encode(batch_tl, convert_to_tensor=True)
+# 4. Re-embed only the changed pairs
+if any(pending.values()):
+    try:
+        print("📦 Loading SentenceTransformer model (this may take a few minutes)...")
+        model = SentenceTransformer(EMBEDDING_MODEL)
+        print("✅ Model loaded.")
+    except Exception as e:
+        print(f"Failed to load model: {e}")
+        exit()
 
-    batch_sim = util.cos_sim(embeddings_en, embeddings_tl).diagonal()
-    similarities.extend(batch_sim.tolist())
+    # Encode each distinct English utterance once; every target is compared against it
+    changed_en = sorted({src for pairs in pending.values() for src, _ in pairs.values()})
+    print("🔍 Encoding source utterances...")
+    embeddings_en = model.encode(changed_en, batch_size=batch_size, convert_to_tensor=True, show_progress_bar=True)
+    en_index = {text: i for i, text in enumerate(changed_en)}
+
+    for target in targets:
+        items = list(pending[target].items())
+        new_scores = {}
+
+        print(f"🔍 Scoring semantic similarity for '{target}'...")
+        for i in tqdm(range(0, len(items), batch_size), desc=f"Scoring {target}"):
+            batch = items[i:i+batch_size]
+            batch_en = embeddings_en[[en_index[src] for _, (src, _) in batch]]
+            embeddings_tl = model.encode([tl for _, (_, tl) in batch], convert_to_tensor=True)
+
+            batch_sim = util.cos_sim(batch_en, embeddings_tl).diagonal()
+            new_scores.update(zip([h for h, _ in batch], batch_sim.tolist()))
+
+        hashes = row_hashes(df, target)
+        similarities[target] = [
+            new_scores[h] if h in new_scores else score
+            for h, score in zip(hashes, similarities[target])
+        ]
+else:
+    print("✅ No changed rows, all scores carried forward.")
 
 # 5. Append Results
-df["similarity"] = similarities
-threshold = 0.70
-df["needs_review"] = df["similarity"] < threshold
+for target in targets:
+    sim_col, review_col = score_columns(target)
+    df[sim_col] = pd.to_numeric(pd.Series(similarities[target], index=df.index, dtype="object"))
+    df[review_col] = df[sim_col].notna() & (df[sim_col] < threshold)
+
+if prev is not None:
+    carry_over_missing_targets(prev, df, targets, previous_path)
+df[MODEL_COL] = EMBEDDING_MODEL
 
 # 6. Save to File
-output_path = "evaluated_translations_with_similarity2.csv"
-df.to_csv(output_path, index=False)
-print(f"✅ Evaluation complete! Saved to: {output_path}")
-print(f"🔎 {df['needs_review'].sum()} rows flagged for review (similarity < {threshold})")
+df.to_csv(args.output, index=False)
+print(f"✅ Evaluation complete! Saved to: {args.output}")
+for target in targets:
+    _, review_col = score_columns(target)
+    print(f"🔎 [{target}] {df[review_col].sum()} rows flagged for review (similarity < {threshold})")
@@ -1,45 +1,143 @@
 from transformers import pipeline
 import pandas as pd
 from tqdm import tqdm  # Progress bar
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
 import warnings
 warnings.filterwarnings("ignore")  # Suppress tokenizer warnings
 
-# 1. Load Dataset
-df = pd.read_csv("dataset/Bitext_Sample_Customer_Service_Training_Dataset.csv")
-print(f"Original dataset shape: {df.shape}")
-
-# 2. Initialize Translator (with error handling)
-try:
-    translator = pipeline(
-        "translation",
-        model="Helsinki-NLP/opus-mt-en-tl",
-        device="cpu"  # Use "cuda" if you have GPU
-    )
-except Exception as e:
-    print(f"Failed to load model: {e}")
-    exit()
-
-# 3. Optimized Translation Function
-def translate_to_tagalog(text):
-    try:
-        if pd.isna(text) or str(text).strip() == "":
-            return ""
-        result = translator(text, max_length=100, truncation=True)[0]["translation_text"]
-        return result.replace("Ã±", "ñ").replace("Ã¯", "ï")  # Fix common encoding errors
-    except Exception as e:
-        print(f"Error translating '{text}': {e}")
-        return "TRANSLATION_ERROR"
-
-# 4. Batch Translation (with progress bar)
-batch_size = 40  # Reduce if you get timeout errors
-tagalog_translations = []
-for i in tqdm(range(0, len(df), batch_size)):
-    batch = df["utterance"].iloc[i:i+batch_size].tolist()
-    translated = [translate_to_tagalog(text) for text in batch]
-    tagalog_translations.extend(translated)
-
-df["tagalog"] = tagalog_translations
-
-# 5. Save Results
-df.to_csv("translated_dataset_tagalog.csv", index=False)
-print("Translation complete! Saved to 'translated_dataset_tagalog.csv'")
\ No newline at end of file
+# --- Configuration ---
+DATASET_PATH = "dataset/Bitext_Sample_Customer_Service_Training_Dataset.csv"
+OUTPUT_PATH = "translated_dataset_tagalog.csv"
+SOURCE_COL = "utterance"
+
+# Output column -> opus-mt model. Add an entry here to fan out to another language.
+TARGET_MODELS = {
+    "tagalog": "Helsinki-NLP/opus-mt-en-tl",
+    "cebuano": "Helsinki-NLP/opus-mt-en-ceb",
+    "ilocano": "Helsinki-NLP/opus-mt-en-ilo",
+}
+
+BATCH_SIZE = 40  # Reduce if you get timeout errors
+DEVICE = "cpu"  # Use "cuda" if you have GPU (and set --workers 1)
+
+
+# --- Worker ---
+def translate_batches(target, model_name, batches, num_threads, position=0):
+    """Translates pre-built batches of source text with one opus-mt model.
+
+    Runs inside a worker process, so the model is loaded here rather than in the parent.
+    """
+    import torch
+    torch.set_num_threads(num_threads)  # Split the cores between the workers
+
+    translator = pipeline("translation", model=model_name, device=DEVICE)
+
+    def fix_encoding(text):
+        return text.replace("Ã±", "ñ").replace("Ã¯", "ï")  # Fix common encoding errors
+
+    translations = []
+    for batch in tqdm(batches, desc=target, position=position):
+        try:
+            results = translator(batch, max_length=100, truncation=True, batch_size=len(batch))
+            translations.extend(fix_encoding(r["translation_text"]) for r in results)
+        except Exception:
+            # Fall back to one-by-one so a single bad row doesn't lose the whole batch
+            for text in batch:
+                try:
+                    result = translator(text, max_length=100, truncation=True)[0]["translation_text"]
+                    translations.append(fix_encoding(result))
+                except Exception as e:
+                    print(f"[{target}] Error translating '{text}': {e}")
+                    translations.append("TRANSLATION_ERROR")
+    return target, translations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate the dataset with one or more opus-mt-en-* models.")
+    parser.add_argument("targets", nargs="*", default=["tagalog"],
+                        help=f"Target columns to produce, any of {list(TARGET_MODELS)} (default: tagalog)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of model processes to run at once (default: one per target, capped at CPU count)")
+    args = parser.parse_args()
+
+    unknown = [t for t in args.targets if t not in TARGET_MODELS]
+    if unknown:
+        print(f"Unknown target(s): {unknown}. Choose from {list(TARGET_MODELS)}.")
+        return
+
+    # 1. Load Dataset
+    df = pd.read_csv(DATASET_PATH)
+    print(f"Original dataset shape: {df.shape}")
+
+    # 2. Deduplicate the source stream once, shared by every target model
+    source = df[SOURCE_COL].fillna("").astype(str)
+    unique_texts = [text for text in source.unique() if text.strip() != ""]
+    print(f"Translating {len(unique_texts)} unique utterances into: {', '.join(args.targets)}")
+
+    batches = [unique_texts[i:i+BATCH_SIZE] for i in range(0, len(unique_texts), BATCH_SIZE)]
+
+    # 3. Schedule one model per process, splitting the cores between them
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, min(args.workers or len(args.targets), len(args.targets), cpu_count))
+    threads_per_worker = max(1, cpu_count // workers)
+
+    results = {}
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(translate_batches, target, TARGET_MODELS[target], batches, threads_per_worker, position): target
+            for position, target in enumerate(args.targets)
+        }
+        for future in as_completed(futures):
+            target = futures[future]
+            try:
+                _, translations = future.result()
+            except Exception as e:
+                # Keep going: one unavailable model shouldn't throw away the others' work
+                print(f"[{target}] Translation with '{TARGET_MODELS[target]}' failed: {e}")
+                failed.append(target)
+                continue
+            results[target] = dict(zip(unique_texts, translations))
+
+    if not results:
+        print("No target could be translated, nothing saved.")
+        return
+
+    # 4. Map translations back onto every row (blank utterances stay blank)
+    for target in args.targets:
+        if target in results:
+            df[target] = source.map(results[target]).fillna("")
+
+    # 5. Keep target columns from an earlier run that this run didn't (successfully) produce
+    existing = None
+    if os.path.exists(OUTPUT_PATH):
+        try:
+            existing = pd.read_csv(OUTPUT_PATH)
+        except Exception as e:
+            print(f"[WARNING] Could not read existing '{OUTPUT_PATH}': {e}")
+    if existing is not None:
+        kept = [col for col in TARGET_MODELS if col in existing.columns and col not in results]
+        if kept:
+            same_rows = (
+                SOURCE_COL in existing.columns
+                and existing[SOURCE_COL].fillna("").astype(str).tolist() == source.tolist()
+            )
+            if same_rows:
+                for col in kept:
+                    df[col] = existing[col].values
+                print(f"Kept existing column(s) from '{OUTPUT_PATH}': {', '.join(kept)}")
+            else:
+                print(f"[WARNING] Rows in '{OUTPUT_PATH}' no longer match the dataset; "
+                      f"dropping its old column(s): {', '.join(kept)}")
+
+    # 6. Save Results
+    df.to_csv(OUTPUT_PATH, index=False)
+    print(f"Translation complete! Saved to '{OUTPUT_PATH}'")
+    if failed:
+        print(f"Skipped failed target(s): {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()